@@ -8,45 +8,61 @@ Also generates docs/en/middleware/dds_topics.md from dds_topics.yaml
 import os
 import argparse
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 
 import yaml
 
-def generate_dds_yaml_doc(allMessageFiles, output_file = 'dds_topics.md'):
+SCRIPT_DIR = os.path.dirname(os.path.realpath(__file__))
+MSG_DIR = os.path.join(SCRIPT_DIR, "../../msg")
+
+def write_if_changed(path, content):
+    """
+    Writes content to path, unless the file already holds exactly that content.
+    Leaving unchanged docs untouched keeps their mtime stable for incremental doc builds.
+
+    Parameters:
+    path (str): The file to write.
+    content (str): The text to write.
+
+    Returns:
+    bool: True if the file was written.
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as existing_file:
+            if existing_file.read() == content:
+                return False
+    except (FileNotFoundError, UnicodeDecodeError):
+        pass
+    with open(path, 'w', encoding='utf-8') as content_file:
+        content_file.write(content)
+    return True
+
+
+def generate_dds_yaml_doc(allMessageNames, output_file = 'dds_topics.md'):
     """
     Generates human readable version of dds_topics.yaml.
     Default output is to docs/en/middleware/dds_topics.md
     """
 
-    dds_file_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),"../../src/modules/uxrce_dds_client/dds_topics.yaml")
-    output_file_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),f"../../docs/en/middleware/{output_file}")
+    dds_file_path = os.path.join(SCRIPT_DIR, "../../src/modules/uxrce_dds_client/dds_topics.yaml")
+    output_file_path = os.path.join(SCRIPT_DIR, f"../../docs/en/middleware/{output_file}")
 
     try:
-        with open(dds_file_path, 'r') as file:
+        with open(dds_file_path, 'r', encoding='utf-8') as file:
             data = yaml.safe_load(file)
 
-        # Get messages and topics that are not published by default
-        # Start by getting all that are published.
-        all_messages_in_source = set()
-        all_message_types =set()
-        all_topics =set()
-        for message in data["publications"]:
-            all_message_types.add(message['type'].split("::")[-1])
-            all_topics.add(message['topic'].split('/')[-1])
-        for message in data["subscriptions"]:
-            all_message_types.add(message['type'].split("::")[-1])
-            all_topics.add(message['topic'].split('/')[-1])
-        if data["subscriptions_multi"]: # There is none now
-            dds_markdown += "None\n"
-            for message in data["subscriptions_multi"]:
-                all_message_types.add(message['type'].split("::")[-1])
-                all_topics.add(message['topic'].split('/')[-1])
-        for message in allMessageFiles:
-            all_messages_in_source.add(message.split('/')[-1].split('.')[0])
+        # Get messages that are not published by default
+        # Start by getting the types of all that are published or subscribed.
+        all_message_types = {message['type'].rpartition("::")[2]
+                             for section in ("publications", "subscriptions", "subscriptions_multi")
+                             for message in (data[section] or [])}
+        all_messages_in_source = set(allMessageNames)
         messagesNotExported = all_messages_in_source - all_message_types
 
         # write out the dds file
-        dds_markdown="""# dds_topics.yaml — PX4 Topics Exposed to ROS 2
+        dds_markdown=["""# dds_topics.yaml — PX4 Topics Exposed to ROS 2
 
 ::: info
 This document is [auto-generated](https://github.com/PX4/PX4-Autopilot/blob/main/Tools/msg/generate_msg_docs.py) from the source code.
@@ -61,46 +77,45 @@ This document shows a markdown-rendered version of [dds_topics.yaml](https://git
 
 Topic | Type| Rate Limit
 --- | --- | ---
-"""
+"""]
 
         for message in data["publications"]:
             type = message['type']
-            px4Type=type.split("::")[-1]
-            dds_markdown += f"`{message['topic']}` | [{type}](../msg_docs/{px4Type}.md) | {message.get('rate_limit','')}\n"
+            px4Type=type.rpartition("::")[2]
+            dds_markdown.append(f"`{message['topic']}` | [{type}](../msg_docs/{px4Type}.md) | {message.get('rate_limit','')}\n")
 
-        dds_markdown += "\n## Subscriptions\n\nTopic | Type\n--- | ---\n"
+        dds_markdown.append("\n## Subscriptions\n\nTopic | Type\n--- | ---\n")
 
         for message in data["subscriptions"]:
             type = message['type']
-            px4Type=type.split("::")[-1]
-            dds_markdown += f"{message['topic']} | [{type}](../msg_docs/{px4Type}.md)\n"
+            px4Type=type.rpartition("::")[2]
+            dds_markdown.append(f"{message['topic']} | [{type}](../msg_docs/{px4Type}.md)\n")
 
-        dds_markdown += "\n## Subscriptions Multi\n\n"
+        dds_markdown.append("\n## Subscriptions Multi\n\n")
 
         if not data["subscriptions_multi"]: # There is none now
-            dds_markdown += "None\n"
+            dds_markdown.append("None\n")
         else:
-            print("Warning - we now have subscription_multi data - check format")
-            dds_markdown += "Topic | Type\n--- | ---\n"
+            print("Warning - we now have subscription_multi data - check format", file=sys.stderr)
+            dds_markdown.append("Topic | Type\n--- | ---\n")
             for message in data["subscriptions_multi"]:
-                dds_markdown += f"{message['topic']} | {message['type']}\n"
+                dds_markdown.append(f"{message['topic']} | {message['type']}\n")
 
         if messagesNotExported:
             # Print the topics that are not exported to DDS
-            dds_markdown += "\n## Not Exported\n\nThese messages are not listed in the yaml file.\nThey are not build into the module, and hence are neither published or subscribed."
-            dds_markdown += "\n\n::: details See messages\n"
-            for item in  messagesNotExported:
-                dds_markdown += f"\n- [{item}](../msg_docs/{item}.md)"
-            dds_markdown += "\n:::\n" # End of details block
+            dds_markdown.append("\n## Not Exported\n\nThese messages are not listed in the yaml file.\nThey are not build into the module, and hence are neither published or subscribed.")
+            dds_markdown.append("\n\n::: details See messages\n")
+            for item in sorted(messagesNotExported):
+                dds_markdown.append(f"\n- [{item}](../msg_docs/{item}.md)")
+            dds_markdown.append("\n:::\n") # End of details block
 
         #print(dds_markdown)
-        with open(output_file_path, 'w') as content_file:
-                content_file.write(dds_markdown)
+        write_if_changed(output_file_path, ''.join(dds_markdown))
 
     except yaml.YAMLError as exc:
-        print(f"Error parsing YAML: {exc}")
+        print(f"Error parsing YAML: {exc}", file=sys.stderr)
     except FileNotFoundError:
-        print(f"Error: {dds_file_path} not found.")
+        print(f"Error: {dds_file_path} not found.", file=sys.stderr)
 
 
 def get_msgs_list(msgdir):
@@ -115,92 +130,114 @@ def get_msgs_list(msgdir):
     list: A list of relative paths to .msg files.
     """
     msgs = []
-    for root, _, files in os.walk(msgdir):
-        for fn in files:
-            if fn.endswith(".msg"):
-                relative_path = os.path.relpath(os.path.join(root, fn), msgdir)
-                msgs.append(relative_path)
+
+    def scan(directory, relative_dir):
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    scan(entry.path, os.path.join(relative_dir, entry.name))
+                elif entry.name.endswith(".msg"):
+                    msgs.append(os.path.join(relative_dir, entry.name))
+
+    scan(msgdir, '')
     return msgs
 
 
+def render_one(msg_file, output_dir, msg_path, debug=False):
+    """
+    Generates the markdown doc for a single .msg file.
+
+    Parameters:
+    msg_file (str): Path of the .msg file, relative to msg_path.
+    output_dir (str): The directory the markdown file is written to.
+    msg_path (str): The directory containing the .msg files.
+    debug (bool): Print the description parsing steps.
+
+    Returns:
+    tuple: (msg_name, is_versioned, summary_description) for the index.
+    """
+    msg_name = os.path.splitext(os.path.basename(msg_file))[0]
+    output_file = os.path.join(output_dir, msg_name+'.md')
+    msg_filename = os.path.join(msg_path, msg_file)
+    print("{:} -> {:}".format(msg_filename, output_file))
+
+    #Format msg url
+    msg_url="[source file](https://github.com/PX4/PX4-Autopilot/blob/main/msg/%s)" % msg_file
+
+    #Get msg contents (read the file)
+    with open(msg_filename, 'r', encoding='utf-8') as source_file:
+        msg_contents = source_file.read()
+
+    description_lines = []
+    summary_description = ""
+
+    #Get msg description (leading comment block). The summary is the first paragraph.
+    for line in msg_contents.splitlines(keepends=True):
+        if not (line.startswith('#') or (line.strip() == '')):
+            break
+        if debug:
+            print('DEBUG: line: %s' % line)
+        text = line[1:].strip()
+        if not text and not summary_description:
+            summary_description = '\n'.join(description_lines).strip()
+        description_lines.append(text)
+    msg_description = '\n'.join(description_lines).strip()
+    if not summary_description and msg_description:
+        summary_description = msg_description
+    if debug:
+        print('msg_description: Z%sZ' % msg_description)
+        print('summary_description: Z%sZ' % summary_description)
+
+    #Format markdown using msg name, comment, url, contents.
+    markdown_output="""# %s (UORB message)
+
+%s
+
+%s
+
+```c
+%s
+```
+""" % (msg_name, msg_description, msg_url, msg_contents)
+
+    write_if_changed(output_file, markdown_output)
+
+    return msg_name, "versioned" in msg_file, summary_description
+
+
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description='Generate docs from .msg files')
     parser.add_argument('-d', dest='dir', help='output directory', required=True)
+    parser.add_argument('--debug', action='store_true', help='print description parsing details')
     args = parser.parse_args()
 
     output_dir = args.dir
     if not os.path.isdir(output_dir):
         os.mkdir(output_dir)
 
-    msg_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),"../../msg")
+    msg_path = MSG_DIR
     msg_files = get_msgs_list(msg_path)
     msg_files.sort()
 
-    versioned_msgs_list = ''
-    unversioned_msgs_list = ''
-
-    for msg_file in msg_files:
-        msg_name = os.path.splitext(os.path.basename(msg_file))[0]
-        output_file = os.path.join(output_dir, msg_name+'.md')
-        msg_filename = os.path.join(msg_path, msg_file)
-        print("{:} -> {:}".format(msg_filename, output_file))
-
-        #Format msg url
-        msg_url="[source file](https://github.com/PX4/PX4-Autopilot/blob/main/msg/%s)" % msg_file
-
-        msg_description = ""
-        summary_description = ""
-
-        #Get msg description (first non-empty comment line from top of msg)
-        with open(msg_filename, 'r') as lineparser:
-            line = lineparser.readline()
-            while line.startswith('#') or (line.strip() == ''):
-                print('DEBUG: line: %s' % line)
-                line=line[1:].strip()+'\n'
-                stripped_line=line.strip()
-                if msg_description and not summary_description and stripped_line=='':
-                    summary_description = msg_description.strip()
-
-                msg_description+=line
-                line = lineparser.readline()
-            msg_description=msg_description.strip()
-            if not summary_description and msg_description:
-                summary_description = msg_description
-            print('msg_description: Z%sZ' % msg_description)
-            print('summary_description: Z%sZ' % summary_description)
-            summary_description
-        msg_contents = ""
-        #Get msg contents (read the file)
-        with open(msg_filename, 'r') as source_file:
-            msg_contents = source_file.read()
-
-        #Format markdown using msg name, comment, url, contents.
-        markdown_output="""# %s (UORB message)
-
-%s
+    versioned_msgs = []
+    unversioned_msgs = []
 
-%s
-
-```c
-%s
-```
-""" % (msg_name, msg_description, msg_url, msg_contents)
-
-        with open(output_file, 'w') as content_file:
-            content_file.write(markdown_output)
+    with ProcessPoolExecutor() as executor:
+        results = list(executor.map(render_one, msg_files, repeat(output_dir), repeat(msg_path), repeat(args.debug), chunksize=8))
 
+    for msg_name, is_versioned, summary_description in results:
         # Categorize as versioned or unversioned
-        if "versioned" in msg_file:
-            versioned_msgs_list += '- [%s](%s.md)' % (msg_name, msg_name)
-            if summary_description:
-                versioned_msgs_list += " — %s" % summary_description
-            versioned_msgs_list += "\n"
+        index_entry = '- [%s](%s.md)' % (msg_name, msg_name)
+        if summary_description:
+            index_entry += " — %s" % summary_description
+        if is_versioned:
+            versioned_msgs.append(index_entry)
         else:
-            unversioned_msgs_list += '- [%s](%s.md)' % (msg_name, msg_name)
-            if summary_description:
-                unversioned_msgs_list += " — %s" % summary_description
-            unversioned_msgs_list += "\n"
+            unversioned_msgs.append(index_entry)
+
+    versioned_msgs_list = ''.join(entry + "\n" for entry in versioned_msgs)
+    unversioned_msgs_list = ''.join(entry + "\n" for entry in unversioned_msgs)
 
     # Write out the index.md file
     index_text="""# uORB Message Reference
@@ -225,7 +262,6 @@ Graphs showing how these are used [can be found here](../middleware/uorb_graph.m
 %s
     """ % (versioned_msgs_list, unversioned_msgs_list)
     index_file = os.path.join(output_dir, 'index.md')
-    with open(index_file, 'w') as content_file:
-            content_file.write(index_text)
+    write_if_changed(index_file, index_text)
 
-    generate_dds_yaml_doc(msg_files)
+    generate_dds_yaml_doc([msg_name for msg_name, _, _ in results])